@@ -17,9 +17,18 @@ PARTICULAR PURPOSE.  See the GNU General Public License for more details.
 You should have received a copy of the GNU General Public License along with
 this program.  If not, see http://www.gnu.org/licenses/.
 
-Version: 0.3.2                                      Date: 16 October 2020
+Version: 0.3.3                                      Date: 15 October 2026
 
 Revision History
+    15 October 2026     v0.3.3
+        - fixed bug where the last week rain timestamp was only rounded up to
+          the hour by 3.6 seconds rather than one hour
+        - fixed bug that caused the week plots to fail if no rain data was
+          available
+        - fixed windrose petal placement, petal colour and legend band
+          percentage bugs
+        - added skin.conf [Extras][[HighchartsWeek]] series option
+        - reduced the database access and processing done by each SLE
     17 March 2021       v0.3.2
         - bindings for appTemp and maxSolarRad are now specified under
           skin.conf [Extras] using apptemp_binding and insolation_binding
@@ -52,8 +61,11 @@ import calendar
 import datetime
 import json
 import math
+import re
 import time
+from bisect import bisect_left, bisect_right
 from datetime import date
+from itertools import islice
 
 # WeeWX imports
 import weewx
@@ -64,6 +76,13 @@ import weewx.xtypes
 from weewx.units import ValueTuple, getStandardUnitType, convert
 from weeutil.weeutil import TimeSpan, option_as_list
 
+# orjson is an optional, faster JSON encoder, if it is not available fall back
+# to the python json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # import/setup logging, WeeWX v3 is syslog based but WeeWX v4 is logging based,
 # try v4 logging and if it fails use v3 logging
 try:
@@ -86,11 +105,117 @@ except ImportError:
         logmsg(syslog.LOG_DEBUG, msg)
 
 
+# The SQL expressions, evaluated against a daily summary table, required to
+# calculate each of the aggregates supported by
+# HighchartsDaySummarySearchList.get_day_summary_vectors(). Where possible the
+# arithmetic is done by the database so that only the result is returned.
+DAY_SUMMARY_SQL = {'min': ('min',),
+                   'max': ('max',),
+                   'mintime': ('mintime',),
+                   'maxtime': ('maxtime',),
+                   'sum': ('sum',),
+                   'count': ('count',),
+                   'avg': ('CASE WHEN count > 0 THEN wsum / sumtime END',),
+                   'rms': ('CASE WHEN count > 0 THEN wsquaresum / sumtime END',),
+                   'vecavg': ('CASE WHEN count > 0 THEN xsum / sumtime END',
+                              'CASE WHEN count > 0 THEN ysum / sumtime END'),
+                   'vecdir': ('CASE WHEN count > 0 THEN xsum / sumtime END',
+                              'CASE WHEN count > 0 THEN ysum / sumtime END'),
+                   'gustdir': ('max_dir',)}
+# the number of daily summary records processed at a time
+DAY_SUMMARY_BATCH_SIZE = 1000
+# cache of standard unit type and group lookups, keyed by (unit system,
+# obs type, aggregate)
+_unit_type_cache = {}
+# cache of compiled daily summary query plans, keyed by (obs type, aggregates)
+_day_summary_plan_cache = {}
+# regular expression to extract the precision (decimal places) from a format
+# string such as '%.1f'
+PLACES_RE = re.compile(r'%[-+ #0]*\d*\.(\d+)[eEfFgG]')
+# the maximum number of entries held in each of the get_ago(),
+# get_utc_offset(), get_plot_start() and get_speed_bands() caches
+MEMO_CACHE_SIZE = 512
+# cache of get_ago() results, keyed by (date, years, months)
+_ago_cache = {}
+# cache of local UTC offsets, keyed by (year, day of year, isdst)
+_utc_offset_cache = {}
+# cache of plot start timestamps, keyed by (stop, days, years)
+_plot_start_cache = {}
+# cache of windrose speed band cutoff speeds and labels, keyed by (maximum
+# speed range, speed factors)
+_speed_band_cache = {}
+# the maximum number of series held in the series cache
+SERIES_CACHE_SIZE = 64
+# cache of series obtained from weewx.xtypes.get_series(), keyed by (database,
+# table, obs type, start, stop, aggregate type, aggregate interval)
+_series_cache = {}
+# JSON encoder used when orjson is not available, use compact separators
+_json_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+# ============================================================================
+#                        class HighchartsSearchList
+# ============================================================================
+
+class HighchartsSearchList(weewx.cheetahgenerator.SearchList):
+    """Base class for a Highcharts search list.
+
+    Each template in a report calls get_extension_list() and the search list
+    extension depends only on the timespan stop, so the extension last
+    generated is saved and reused while the timespan stop is unchanged.
+    Subclasses generate their search list extension in calc_extension_list().
+    """
+
+    def __init__(self, generator):
+        # initialize my base class:
+        super(HighchartsSearchList, self).__init__(generator)
+
+        # get the number of decimal places to use for each unit
+        self.places = unit_places(generator.skin_dict)
+        # cache of conversion functions and units keyed by (unit, group)
+        self.conversions = {}
+        # the search list extension we last generated and the timespan stop
+        # it was generated for
+        self.cached_stop = None
+        self.cached_extension = None
+
+    def json_convert_round(self, list_of_val_t, timestamp_vector):
+        """Convert, round and JSON encode vector ValueTuples for display."""
+
+        return json_convert_round(list_of_val_t, timestamp_vector, self.generator.converter,
+                                  self.places, self.conversions)
+
+    def get_extension_list(self, timespan, db_lookup):
+        """Return our search list extension, generating it if necessary.
+
+        Parameters:
+          timespan: An instance of weeutil.weeutil.TimeSpan. This will
+                    hold the start and stop times of the domain of
+                    valid times.
+
+          db_lookup: This is a function that, given a data binding
+                     as its only parameter, will return a database manager
+                     object.
+         """
+
+        # our result depends only on timespan stop, if it is unchanged since
+        # we were last called we can return our last result
+        if self.cached_extension is None or timespan.stop != self.cached_stop:
+            self.cached_extension = self.calc_extension_list(timespan, db_lookup)
+            self.cached_stop = timespan.stop
+        return self.cached_extension
+
+    def calc_extension_list(self, timespan, db_lookup):
+        """Generate our search list extension as a list of dictionaries."""
+
+        raise NotImplementedError
+
+
 # ============================================================================
 #                    class HighchartsDaySummarySearchList
 # ============================================================================
 
-class HighchartsDaySummarySearchList(weewx.cheetahgenerator.SearchList):
+class HighchartsDaySummarySearchList(HighchartsSearchList):
     """Base class for a Highcharts search list that uses Daily Summaries."""
 
     def __init__(self, generator):
@@ -113,107 +238,80 @@ class HighchartsDaySummarySearchList(weewx.cheetahgenerator.SearchList):
                           Member elements can be any of 'min', 'max', 'mintime',
                           'maxtime', 'gustdir', 'sum', 'count', 'avg', 'rms',
                           'vecavg' or 'vecdir'.
+
+            Returns a tuple consisting of a ValueTuple containing the time
+            vector and a dictionary of ValueTuples, keyed by aggregate,
+            containing the aggregate vectors. Vectors are lists with None
+            representing missing data, this is what the WeeWX unit conversion
+            functions and the JSON encoder expect so vectors can be converted
+            and serialised without further processing.
            """
 
-        # the list of supported aggregates
-        vector_aggs = ['gustdir', 'rms', 'vecavg', 'vecdir']
-        # sql field list for scalar types
-        scalar_fields = 'dateTime,min,mintime,max,maxtime,sum,count,wsum,sumtime'
-        # sql field list for vector types
-        vector_fields = ','.join([scalar_fields,
-                                  'max_dir,xsum,ysum,dirsumtime,squaresum,wsquaresum'])
-        # setup up a list of lists for our vectors
+        # The daily summary table name has to be interpolated into our query
+        # so make sure obs_type is a daily summary we know about. Managers
+        # without daily summaries have no daykeys attribute.
+        _daykeys = getattr(db_manager, 'daykeys', None)
+        if _daykeys is not None and obs_type not in _daykeys:
+            raise weewx.UnknownType(obs_type)
+        # setup up a list of lists for our vectors, one per aggregate
         _vec = [list() for x in range(len(agg_list))]
-        # initialise each list in the list of lists
-        for agg in agg_list:
-            _vec[agg_list.index(agg)] = list()
         # setup up our time vector list
         _time_vec = list()
         # initialise a dictionary for our results
         _return = {}
-        # get the unit system in use
-        _row = db_manager.getSql("SELECT usUnits FROM %s LIMIT 1;" % db_manager.table_name)
-        std_unit_system = _row[0] if _row is not None else None
-        # the list of fields we need depend on whether we have a scalar type or a
-        # vector type, which one is it
-        if any(x in vector_aggs for x in agg_list):
-            # it's a vector
-            sql_fields = vector_fields
-        else:
-            # it's a scalar
-            sql_fields = scalar_fields
-        # get our interpolation dictionary for the query
-        inter_dict = {'start': weeutil.weeutil.startOfDay(timespan.start),
-                      'stop': timespan.stop,
-                      'table_name': 'archive_day_%s' % obs_type,
-                      'sql_fields': sql_fields}
+        # get the unit system in use, the manager already knows this unless
+        # the database was empty when it was opened in which case we need to
+        # go to the database
+        std_unit_system = getattr(db_manager, 'std_unit_system', None)
+        if std_unit_system is None:
+            _row = db_manager.getSql("SELECT usUnits FROM %s LIMIT 1;" % db_manager.table_name)
+            std_unit_system = _row[0] if _row is not None else None
+        # get the SQL query and the compiled calculations for the aggregates
+        # we have been asked for, these depend only on the obs type and
+        # aggregates so are cached
+        sql_str, singles, fused = day_summary_plan(obs_type, agg_list)
+        # the start and stop timestamps are bound as query parameters
+        _params = (weeutil.weeutil.startOfDay(timespan.start), timespan.stop)
+        # Turn our compiled calculations into a plan of steps. Each step
+        # calculates one or more aggregates for a batch of records and extends
+        # the relevant vectors, each vector's extend method is bound once here
+        # rather than looked up every batch.
+        plan = [day_summary_step(extractor, _vec[i].extend) for i, extractor in singles]
+        if fused is not None:
+            (avg_i, dir_i, idx) = fused
+            plan.append(day_summary_vector_step(idx, _vec[avg_i].extend, _vec[dir_i].extend))
+        time_extend = _time_vec.extend
         # get a cursor object for our query
         _cursor = db_manager.connection.cursor()
         try:
-            # put together our SQL query string
-            sql_str = "SELECT %(sql_fields)s FROM %(table_name)s WHERE dateTime >= %(start)s AND dateTime < %(stop)s" % inter_dict
-            # loop through each record our query returns
-            for _rec in _cursor.execute(sql_str):
-                # loop through each aggregate we have been asked for
-                for agg in agg_list:
-                    # Sql query result fields will vary depending on whether the
-                    # underlying obs is a scalar or vector type. At the moment
-                    # 'wind' is the only vector obs. Fields are as follows:
-                    # scalar: [0]=dateTime    [1]=min        [2]=mintime     [3]=max
-                    #         [4]=maxtime     [5]=sum        [6]=count       [7]=wsum
-                    #         [8]=sumtime
-                    # vector: [0]=dateTime    [1]=min        [2]=mintime     [3]=max
-                    #         [4]=maxtime     [5]=sum        [6]=count       [7]=wsum
-                    #         [8]=sumtime     [9]=max_dir    [10]=xsum       [11]=ysum
-                    #         [12]=dirsumtime [13]=squaresum [14]=wsquaresum
-
-                    # calculate the aggregate
-                    if agg == 'min':
-                        _result = _rec[1]
-                    elif agg == 'max':
-                        _result = _rec[3]
-                    elif agg == 'sum':
-                        _result = _rec[5]
-                    elif agg == 'gustdir':
-                        _result = _rec[9]
-                    elif agg == 'mintime':
-                        _result = int(_rec[2]) if _rec[2] else None
-                    elif agg == 'maxtime':
-                        _result = int(_rec[4]) if _rec[4] else None
-                    elif agg == 'count':
-                        _result = int(_rec[6]) if _rec[6] else None
-                    elif agg == 'avg':
-                        _result = _rec[7] / _rec[8] if _rec[6] else None
-                    elif agg == 'rms':
-                        _result = math.sqrt(_rec[14] / _rec[8]) if _rec[6] else None
-                    elif agg == 'vecavg':
-                        _result = math.sqrt((_rec[10] ** 2 + _rec[11] ** 2) / _rec[8] ** 2) if _rec[6] else None
-                    elif agg == 'vecdir':
-                        if _rec[10] == 0.0 and _rec[11] == 0.0:
-                            _result = None
-                        elif _rec[10] and _rec[11]:
-                            deg = 90.0 - math.degrees(math.atan2(_rec[11], _rec[10]))
-                            _result = deg if deg >= 0.0 else deg + 360.0
-                        else:
-                            _result = None
-                    # if we have not found it then return None
-                    else:
-                        _result = None
-                    # add the aggregate to our vector
-                    _vec[agg_list.index(agg)].append(_result)
-                # add the time to our time vector
-                _time_vec.append(_rec[0])
+            # Process the records our query returns in batches. Within each
+            # batch our vectors are calculated a column at a time rather than
+            # a record at a time. The weedb cursor wrappers do not all support
+            # fetchmany() so take each batch from the cursor iterator.
+            _rec_it = iter(_cursor.execute(sql_str, _params))
+            while True:
+                _recs = list(islice(_rec_it, DAY_SUMMARY_BATCH_SIZE))
+                if not _recs:
+                    break
+                # Transpose the batch into columns. Our vectors can then be
+                # extended from sequences of known size, in many cases the
+                # column itself, rather than being built element by element.
+                _cols = list(zip(*_recs))
+                # add the times to our time vector
+                time_extend(_cols[0])
+                # calculate each aggregate and add it to its vector
+                for step in plan:
+                    step(_cols)
         finally:
             # close our cursor
             _cursor.close()
         # get unit type and group for time
-        (_time_type, _time_group) = weewx.units.getStandardUnitType(std_unit_system,
-                                                                    'dateTime')
+        (_time_type, _time_group) = standard_unit_type(std_unit_system, 'dateTime')
         # loop through each aggregate we were asked for getting unit and group and
         # producing a ValueTuple and adding to our result dictionary
-        for agg in agg_list:
-            (t, g) = weewx.units.getStandardUnitType(std_unit_system, obs_type, agg)
-            _return[agg] = ValueTuple(_vec[agg_list.index(agg)], t, g)
+        for i, agg in enumerate(agg_list):
+            (t, g) = standard_unit_type(std_unit_system, obs_type, agg)
+            _return[agg] = ValueTuple(_vec[i], t, g)
         # return our time vector and dictionary of aggregate vectors
         return ValueTuple(_time_vec, _time_type, _time_group), _return
 
@@ -229,25 +327,12 @@ class HighchartsMinRanges(weewx.cheetahgenerator.SearchList):
         # initialize my base class:
         super(HighchartsMinRanges, self).__init__(generator)
 
-    def get_extension_list(self, timespan, db_lookup):
-        """Obtain y-axis minimum range values as a list of dictionaries.
-
-        Parameters:
-          timespan: An instance of weeutil.weeutil.TimeSpan. This will
-                    hold the start and stop times of the domain of
-                    valid times.
-
-          db_lookup: This is a function that, given a data binding
-                     as its only parameter, will return a database manager
-                     object.
-         """
-
-        t1 = time.time()
-
-        mr_dict = {}
+        # Our minimum ranges depend only on the skin config so obtain them
+        # once now rather than each time get_extension_list() is called.
+        self.mr_dict = {}
         # get our MinRange config dict if it exists
-        mr_config_dict = self.generator.skin_dict['Extras'].get('MinRange') \
-            if 'Extras' in self.generator.skin_dict else None
+        mr_config_dict = generator.skin_dict['Extras'].get('MinRange') \
+            if 'Extras' in generator.skin_dict else None
         # if we have a config dict then loop through any key/value pairs
         # discarding any pairs that are non numeric
         if mr_config_dict:
@@ -262,13 +347,32 @@ class HighchartsMinRanges(weewx.cheetahgenerator.SearchList):
                     except (ValueError, KeyError):
                         continue
                     else:
-                        _range = self.generator.converter.convert(_value_vt).value
+                        _range = generator.converter.convert(_value_vt).value
                 else:
                     try:
                         _range = float(_value)
                     except ValueError:
                         continue
-                mr_dict[_key + '_min_range'] = _range
+                self.mr_dict[_key + '_min_range'] = _range
+
+    def get_extension_list(self, timespan, db_lookup):
+        """Obtain y-axis minimum range values as a list of dictionaries.
+
+        Parameters:
+          timespan: An instance of weeutil.weeutil.TimeSpan. This will
+                    hold the start and stop times of the domain of
+                    valid times.
+
+          db_lookup: This is a function that, given a data binding
+                     as its only parameter, will return a database manager
+                     object.
+         """
+
+        t1 = time.time()
+
+        # our data dict was obtained when we were initialised so just return
+        # it
+        mr_dict = self.mr_dict
         t2 = time.time()
         if weewx.debug >= 2:
             logdbg("HighchartsMinRanges SLE executed in %0.3f seconds" % (t2 - t1))
@@ -280,7 +384,7 @@ class HighchartsMinRanges(weewx.cheetahgenerator.SearchList):
 #                            class HighchartsWeek
 # ============================================================================
 
-class HighchartsWeek(weewx.cheetahgenerator.SearchList):
+class HighchartsWeek(HighchartsSearchList):
     """SearchList to generate JSON vectors for Highcharts week plots."""
 
     def __init__(self, generator):
@@ -319,36 +423,80 @@ class HighchartsWeek(weewx.cheetahgenerator.SearchList):
             apptemp_binding = 'wx_binding'
         self.apptemp_binding = apptemp_binding
 
+        # Which series do we generate? A skin that does not use all of our
+        # series can list the series it uses with the series option under
+        # [Extras][[HighchartsWeek]], only those series are obtained from the
+        # database. If not specified generate all series.
+        week_dict = generator.skin_dict.get('Extras', {}).get('HighchartsWeek', {})
+        week_series = option_as_list(week_dict.get('series'))
+        week_series = [name.strip() for name in week_series if name.strip()] if week_series else []
+        if week_series:
+            self.series = tuple([entry for entry in self.SERIES if entry[0] in week_series])
+        else:
+            self.series = self.SERIES
+        # the names of any series we do not generate
+        self.disabled_series = [entry[0] for entry in self.SERIES if entry not in self.series]
+
+    # The series plotted by the Week SLE. Each entry is a tuple of (series
+    # name, obs type, binding attribute, aggregate type, aggregate interval).
+    # Series that may come from a database other than the default database
+    # have the name of the attribute holding their binding, otherwise None.
+    SERIES = (('outTemp', 'outTemp', None, None, None),
+              ('dewpoint', 'dewpoint', None, None, None),
+              ('appTemp', 'appTemp', 'apptemp_binding', None, None),
+              ('windchill', 'windchill', None, None, None),
+              ('heatindex', 'heatindex', None, None, None),
+              ('outHumidity', 'outHumidity', None, None, None),
+              ('barometer', 'barometer', None, None, None),
+              ('windSpeed', 'windSpeed', None, None, None),
+              ('windGust', 'windGust', None, None, None),
+              ('windDir', 'windDir', None, None, None),
+              # rain is summed over the hour
+              ('rain', 'rain', None, 'sum', 3600),
+              ('radiation', 'radiation', None, None, None),
+              ('insolation', 'maxSolarRad', 'insolation_binding', None, None),
+              ('uv', 'UV', None, None, None))
+
     def get_vector(self, db_manager, timespan, obs_type,
-                   aggregate_type=None, aggregate_interval=None):
+                   aggregate_type=None, aggregate_interval=None, ms_cache=None):
         """Get a data and timestamp vector for a given obs.
 
-        Returns two vectors. The first is the obs data vector and the second
-        is the timestamp vector in ms.
+        Returns a tuple. The first element is the obs data ValueTuple, which
+        is yet to be converted and rounded, and the second is the timestamp
+        vector in ms. If 'ms_cache' is a dict it is used to share timestamp
+        vectors between series that have the same underlying time vector, in
+        which case the timestamp vector must not be modified.
         """
 
         # get our vectors as ValueTuples, wrap in a try..except in case
         # obs_type does not exist
         try:
-            (t_start_vt, t_stop_vt, obs_vt) = weewx.xtypes.get_series(obs_type, timespan, db_manager,
-                                                                      aggregate_type=aggregate_type,
-                                                                      aggregate_interval=aggregate_interval)
+            (t_start_vt, t_stop_vt, obs_vt) = get_series_cached(obs_type, timespan, db_manager,
+                                                                aggregate_type=aggregate_type,
+                                                                aggregate_interval=aggregate_interval)
         except weewx.UnknownType:
             logdbg("Unknown type '%s'" % obs_type)
             return None, None
-        # convert our obs ValueTuple
-        obs_vt = self.generator.converter.convert(obs_vt)
-        # can't use ValueHelper so round our results manually
-        # first get the number of decimal points
-        round_places = int(self.generator.skin_dict['Units']['StringFormats'].get(obs_vt.unit, "1f")[-2])
-        # now do the rounding, our result is a vector
-        obs_rounded_vector = [round_none(x, round_places) for x in obs_vt.value]
-        # get our time vector in ms (Highcharts requirement)
-        t_ms_vector = [float(x) * 1000 for x in t_stop_vt.value]
-        # return our time and obs data vectors
-        return obs_rounded_vector, t_ms_vector
+        # if we have no data there is no time vector to calculate
+        if not obs_vt.value:
+            return obs_vt, []
+        # Get our time vector in ms (Highcharts requirement). Timestamps are
+        # integers so keep them as integers, this avoids a trailing '.0' on
+        # every timestamp in our JSON output. Series obtained from the same
+        # query share the same time vector so if we can, reuse any ms vector
+        # we have already calculated for it. Keep a reference to the time
+        # vector so its id remains valid.
+        _key = id(t_stop_vt.value)
+        if ms_cache is not None and _key in ms_cache:
+            t_ms_vector = ms_cache[_key][1]
+        else:
+            t_ms_vector = [x * 1000 for x in t_stop_vt.value]
+            if ms_cache is not None:
+                ms_cache[_key] = (t_stop_vt.value, t_ms_vector)
+        # return our obs data and time vectors
+        return obs_vt, t_ms_vector
 
-    def get_extension_list(self, timespan, db_lookup):
+    def calc_extension_list(self, timespan, db_lookup):
         """Generate the JSON vectors and return as a list of dictionaries.
 
         Parameters:
@@ -364,142 +512,70 @@ class HighchartsWeek(weewx.cheetahgenerator.SearchList):
         t1 = time.time()
 
         # get UTC offset
-        stop_struct = time.localtime(timespan.stop)
-        utc_offset = (calendar.timegm(stop_struct) - calendar.timegm(time.gmtime(time.mktime(stop_struct))))/60
+        utc_offset = get_utc_offset(timespan.stop)
 
         # Our period of interest is a seven day period but starting on a start
         # of day boundary. Get a TimeSpan object covering this period.
-        # first get the start of today
-        _ts = weeutil.weeutil.startOfDay(timespan.stop)
-        # get the start of today as a datetime object so we can do some
-        # daylight saving safe date arithmetic
-        _ts_dt = datetime.datetime.fromtimestamp(_ts)
-        # now go back seven days in a daylight saving safe manner
-        _start_dt = _ts_dt - datetime.timedelta(days=7)
-        # and convert back to a timestamp
-        _start_ts = time.mktime(_start_dt.timetuple())
+        _start_ts = get_plot_start(timespan.stop, days=7)
         # get a TimeSpan object representing the time span of interest
         t_span = TimeSpan(_start_ts, timespan.stop)
 
-        # get our temperature vector
-        outtemp_vector, outtemp_time_vector = self.get_vector(db_lookup(),
-                                                              timespan=t_span,
-                                                              obs_type='outTemp')
-
-        # get our dewpoint vector
-        dewpoint_vector, dewpoint_time_vector = self.get_vector(db_lookup(),
-                                                                timespan=t_span,
-                                                                obs_type='dewpoint')
-
-        # Get our apparent temperature vector. We could have a different
-        # binding so call db_lookup() with that binding. Wrap in a try..except
-        # to catch any exceptions.
-        try:
-            apptemp_vector, apptemp_time_vector = self.get_vector(db_lookup(self.apptemp_binding),
-                                                                  timespan=t_span,
-                                                                  obs_type='appTemp')
-        except weewx.UnknownBinding:
-            # an UnknownBinding exception has been raised, we can't recover
-            # from this so re-raise the exception, this will cause the report
-            # to abort
-            raise
-
-        # get our wind chill vector
-        windchill_vector, windchill_time_vector = self.get_vector(db_lookup(),
-                                                                  timespan=t_span,
-                                                                  obs_type='windchill')
-        # get our heat index vector
-        heatindex_vector, heatindex_time_vector = self.get_vector(db_lookup(),
-                                                                  timespan=t_span,
-                                                                  obs_type='heatindex')
-        # get our humidity vector
-        outhumidity_vector, outhumidity_time_vector = self.get_vector(db_lookup(),
-                                                                      timespan=t_span,
-                                                                      obs_type='outHumidity')
-        # get our barometer vector
-        barometer_vector, barometer_time_vector = self.get_vector(db_lookup(),
-                                                                  timespan=t_span,
-                                                                  obs_type='barometer')
-        # get our wind speed vector
-        windspeed_vector, windspeed_time_vector = self.get_vector(db_lookup(),
-                                                                  timespan=t_span,
-                                                                  obs_type='windSpeed')
-        # get our wind gust vector
-        windgust_vector, windgust_time_vector = self.get_vector(db_lookup(),
-                                                                timespan=t_span,
-                                                                obs_type='windGust')
-        # get our wind direction vector
-        winddir_vector, winddir_time_vector = self.get_vector(db_lookup(),
-                                                              timespan=t_span,
-                                                              obs_type='windDir')
-        # get our rain vector, need to sum over the hour
-        rain_vector, rain_time_vector = self.get_vector(db_lookup(),
-                                                        timespan=t_span,
-                                                        obs_type='rain',
-                                                        aggregate_type='sum',
-                                                        aggregate_interval=3600)
-        # Check if our last interval is a partial hour. If it is then round up
-        # the last timestamp in the time vector to an hour boundary. This
-        # avoids display issues with the column chart. We need to make sure we
-        # have at least two intervals though.
-        if len(rain_time_vector) > 1:
-            if rain_time_vector[-1] < rain_time_vector[-2] + 3600:
-                rain_time_vector[-1] = rain_time_vector[-2] + 3600
-        # get our radiation vector
-        radiation_vector, radiation_time_vector = self.get_vector(db_lookup(),
-                                                                  timespan=t_span,
-                                                                  obs_type='radiation')
-        # Get our insolation vector. We could have a different binding so call
-        # db_lookup() with that binding. Wrap in a try..except to catch any
-        # exceptions.
-        try:
-            insolation_vector, insolation_time_vector = self.get_vector(db_lookup(self.insolation_binding),
-                                                                        timespan=t_span,
-                                                                        obs_type='maxSolarRad')
-        except weewx.UnknownBinding:
-            # an UnknownBinding exception has been raised, we can't recover
-            # from this so re-raise the exception, this will cause the report
-            # to abort
-            raise
-
-        # get our UV vector
-        uv_vector, uv_time_vector = self.get_vector(db_lookup(),
-                                                    timespan=t_span,
-                                                    obs_type='UV')
-        # format our vectors in json format
-        outtemp_json = json_zip_vectors([outtemp_vector], outtemp_time_vector)
-        dewpoint_json = json_zip_vectors([dewpoint_vector], dewpoint_time_vector)
-        apptemp_json = json_zip_vectors([apptemp_vector], apptemp_time_vector)
-        windchill_json = json_zip_vectors([windchill_vector], windchill_time_vector)
-        heatindex_json = json_zip_vectors([heatindex_vector], heatindex_time_vector)
-        outhumidity_json = json_zip_vectors([outhumidity_vector], outhumidity_time_vector)
-        barometer_json = json_zip_vectors([barometer_vector], barometer_time_vector)
-        windspeed_json = json_zip_vectors([windspeed_vector], windspeed_time_vector)
-        windgust_json = json_zip_vectors([windgust_vector], windgust_time_vector)
-        winddir_json = json_zip_vectors([winddir_vector], winddir_time_vector)
-        rain_json = json_zip_vectors([rain_vector], rain_time_vector)
-        radiation_json = json_zip_vectors([radiation_vector], radiation_time_vector)
-        insolation_json = json_zip_vectors([insolation_vector], insolation_time_vector)
-        uv_json = json_zip_vectors([uv_vector], uv_time_vector)
-
-        # put into a dictionary to return
-        search_list_extension = {'outTempWeekjson': outtemp_json,
-                                 'dewpointWeekjson': dewpoint_json,
-                                 'appTempWeekjson': apptemp_json,
-                                 'windchillWeekjson': windchill_json,
-                                 'heatindexWeekjson': heatindex_json,
-                                 'outHumidityWeekjson': outhumidity_json,
-                                 'barometerWeekjson': barometer_json,
-                                 'windSpeedWeekjson': windspeed_json,
-                                 'windGustWeekjson': windgust_json,
-                                 'windDirWeekjson': winddir_json,
-                                 'rainWeekjson': rain_json,
-                                 'radiationWeekjson': radiation_json,
-                                 'insolationWeekjson': insolation_json,
-                                 'uvWeekjson': uv_json,
-                                 'utcOffset': utc_offset,
-                                 'weekPlotStart': _start_ts * 1000,
-                                 'weekPlotEnd': timespan.stop * 1000}
+        # Get the database manager for each binding we use. A series with its
+        # own binding could be in a different database so call db_lookup()
+        # with that binding, any UnknownBinding exception is unrecoverable so
+        # let it propagate and abort the report. At the same time make a note
+        # of the unaggregated series in each database. Different bindings
+        # (eg the default binding and 'wx_binding') often give the same
+        # database manager so group the series by manager rather than by
+        # binding.
+        db_managers = {}
+        _unaggregated = {}
+        for name, obs_type, binding_attr, agg_type, agg_interval in self.series:
+            _binding = getattr(self, binding_attr) if binding_attr is not None else None
+            if _binding not in db_managers:
+                db_managers[_binding] = db_lookup(_binding)
+            if agg_type is None:
+                _db_manager = db_managers[_binding]
+                _unaggregated.setdefault(id(_db_manager), (_db_manager, []))[1].append(obs_type)
+        # Unaggregated series from the same database can be obtained with a
+        # single query, so first obtain those series for each database.
+        for _db_manager, obs_types in _unaggregated.values():
+            prefetch_archive_series(obs_types, t_span, _db_manager)
+        # Get our vectors and set up their json format strings. The json
+        # strings are not generated until a template uses them, a template
+        # that does not use a series does not incur the cost of converting,
+        # rounding and formatting it. Series we could not obtain are None so
+        # templates can test for them.
+        search_list_extension = {}
+        ms_cache = {}
+        for name, obs_type, binding_attr, agg_type, agg_interval in self.series:
+            _binding = getattr(self, binding_attr) if binding_attr is not None else None
+            (data_vt, time_vector) = self.get_vector(db_managers[_binding],
+                                                     timespan=t_span,
+                                                     obs_type=obs_type,
+                                                     aggregate_type=agg_type,
+                                                     aggregate_interval=agg_interval,
+                                                     ms_cache=ms_cache)
+            if name == 'rain' and time_vector is not None and len(time_vector) > 1:
+                # Check if our last rain interval is a partial hour. If it is
+                # then round up the last timestamp in the time vector to an
+                # hour boundary. This avoids display issues with the column
+                # chart. We need to make sure we have at least two intervals
+                # though. Note our time vector is in ms and may be shared so
+                # work on a copy.
+                time_vector = list(time_vector)
+                time_vector[-1] = max(time_vector[-1], time_vector[-2] + 3600000)
+            if data_vt is not None:
+                search_list_extension[name + 'Weekjson'] = LazyJson(self.json_convert_round,
+                                                                    [data_vt], time_vector)
+            else:
+                search_list_extension[name + 'Weekjson'] = None
+        # series we were asked not to generate are None
+        for name in self.disabled_series:
+            search_list_extension[name + 'Weekjson'] = None
+        search_list_extension.update({'utcOffset': utc_offset,
+                                      'weekPlotStart': int(_start_ts) * 1000,
+                                      'weekPlotEnd': timespan.stop * 1000})
         t2 = time.time()
         if weewx.debug >= 2:
             logdbg("HighchartsWeek SLE executed in %0.3f seconds" % (t2 - t1))
@@ -539,7 +615,7 @@ class HighchartsYear(HighchartsDaySummarySearchList):
             apptemp_binding = 'wx_binding'
         self.apptemp_binding = apptemp_binding
 
-    def get_extension_list(self, timespan, db_lookup):
+    def calc_extension_list(self, timespan, db_lookup):
         """Generate the JSON vectors and return as a list of dictionaries.
 
         Parameters:
@@ -555,30 +631,21 @@ class HighchartsYear(HighchartsDaySummarySearchList):
         t1 = time.time()
 
         # get UTC offset
-        stop_struct = time.localtime(timespan.stop)
-        utc_offset = (calendar.timegm(stop_struct) - calendar.timegm(time.gmtime(time.mktime(stop_struct)))) / 60
+        utc_offset = get_utc_offset(timespan.stop)
 
         # our start time is one year ago from midnight at the start of today
-        # first get the start of today
-        _ts = weeutil.weeutil.startOfDay(timespan.stop)
-        # then go back 1 year
-        _ts_dt = datetime.datetime.fromtimestamp(_ts)
-        try:
-            _start_dt = _ts_dt.replace(year=_ts_dt.year-1)
-        except ValueError:
-            _start_dt = _ts_dt.replace(year=_ts_dt.year-1, day=_ts_dt.day-1)
-        _start_ts = time.mktime(_start_dt.timetuple())
+        _start_ts = get_plot_start(timespan.stop, years=1)
         t_span = TimeSpan(_start_ts, timespan.stop)
 
+        # get the database manager for our default binding, we use it for
+        # all but appTemp
+        db_manager = db_lookup()
+
         # get our outTemp vectors
-        (outtemp_time_vt, outtemp_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (outtemp_time_vt, outtemp_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                        obs_type='outTemp', 
                                                                        timespan=t_span, 
                                                                        agg_list=['min', 'max', 'avg'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        outtemp_min_vt = self.generator.converter.convert(outtemp_dict['min'])
-        outtemp_max_vt = self.generator.converter.convert(outtemp_dict['max'])
-        outtemp_avg_vt = self.generator.converter.convert(outtemp_dict['avg'])
 
         # Get our appTemp vectors. We could have a different binding so call
         # db_lookup() with that binding. Wrap in a try..except to catch any
@@ -593,174 +660,100 @@ class HighchartsYear(HighchartsDaySummarySearchList):
             # from this so re-raise the exception, this will cause the report
             # to abort
             raise
-        # get our vector ValueTuple out of the dictionary and convert it
-        apptemp_min_vt = self.generator.converter.convert(apptemp_dict['min'])
-        apptemp_max_vt = self.generator.converter.convert(apptemp_dict['max'])
-        apptemp_avg_vt = self.generator.converter.convert(apptemp_dict['avg'])
+        except weewx.UnknownType:
+            # there is no appTemp daily summary so we have no appTemp data
+            apptemp_dict = None
 
         # get our windchill vector
-        (windchill_time_vt, windchill_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (windchill_time_vt, windchill_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                            obs_type='windchill', 
                                                                            timespan=t_span, 
                                                                            agg_list=['avg'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        windchill_avg_vt = self.generator.converter.convert(windchill_dict['avg'])
         # get our heatindex vector
-        (heatindex_time_vt, heatindex_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (heatindex_time_vt, heatindex_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                            obs_type='heatindex', 
                                                                            timespan=t_span, 
                                                                            agg_list=['avg'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        heatindex_avg_vt = self.generator.converter.convert(heatindex_dict['avg'])
         # get our humidity vectors
-        (outhumidity_time_vt, outhumidity_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (outhumidity_time_vt, outhumidity_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                                obs_type='outHumidity',
                                                                                timespan=t_span,
                                                                                agg_list=['min', 'max', 'avg'])
         # get our barometer vectors
-        (barometer_time_vt, barometer_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (barometer_time_vt, barometer_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                            obs_type='barometer', 
                                                                            timespan=t_span, 
                                                                            agg_list=['min', 'max', 'avg'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        barometer_min_vt = self.generator.converter.convert(barometer_dict['min'])
-        barometer_max_vt = self.generator.converter.convert(barometer_dict['max'])
-        barometer_avg_vt = self.generator.converter.convert(barometer_dict['avg'])
-        # get our wind vectors
-        (wind_time_vt, wind_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        # get our wind vectors, this includes our wind direction vector
+        (wind_time_vt, wind_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                  obs_type='wind',
                                                                  timespan=t_span,
-                                                                 agg_list=['max', 'avg'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        wind_max_vt = self.generator.converter.convert(wind_dict['max'])
-        wind_avg_vt = self.generator.converter.convert(wind_dict['avg'])
+                                                                 agg_list=['max', 'avg', 'vecdir'])
         # get our windSpeed vectors
-        (windspeed_time_vt, windspeed_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (windspeed_time_vt, windspeed_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                            obs_type='windSpeed', 
                                                                            timespan=t_span, 
                                                                            agg_list=['max', 'avg'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        windspeed_max_vt = self.generator.converter.convert(windspeed_dict['max'])
-        windspeed_avg_vt = self.generator.converter.convert(windspeed_dict['avg'])
-        # get our windDir vectors
-        (winddir_time_vt, winddir_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
-                                                                       obs_type='wind',
-                                                                       timespan=t_span,
-                                                                       agg_list=['vecdir'])
         # get our rain vectors
-        (rain_time_vt, rain_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (rain_time_vt, rain_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                  obs_type='rain',
                                                                  timespan=t_span,
                                                                  agg_list=['sum'])
-        # get our vector ValueTuple out of the dictionary and convert it
-        rain_sum_vt = self.generator.converter.convert(rain_dict['sum'])
         # get our radiation vectors
-        (radiation_time_vt, radiation_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (radiation_time_vt, radiation_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                                            obs_type='radiation', 
                                                                            timespan=t_span, 
                                                                            agg_list=['min', 'max', 'avg'])
         # get our UV vectors
-        (uv_time_vt, uv_dict) = self.get_day_summary_vectors(db_manager=db_lookup(),
+        (uv_time_vt, uv_dict) = self.get_day_summary_vectors(db_manager=db_manager,
                                                              obs_type='UV',
                                                              timespan=t_span,
                                                              agg_list=['min', 'max', 'avg'])
 
-        # get no of decimal places to use when formatting results
-        temp_places = int(self.generator.skin_dict['Units']['StringFormats'].get(outtemp_min_vt.unit,
-                                                                                 "1f")[-2])
-        outhumidity_places = int(self.generator.skin_dict['Units']['StringFormats'].get(outhumidity_dict['min'].unit,
-                                                                                        "1f")[-2])
-        barometer_places = int(self.generator.skin_dict['Units']['StringFormats'].get(barometer_min_vt.unit,
-                                                                                      "1f")[-2])
-        wind_places = int(self.generator.skin_dict['Units']['StringFormats'].get(wind_max_vt.unit,
-                                                                                 "1f")[-2])
-        windspeed_places = int(self.generator.skin_dict['Units']['StringFormats'].get(windspeed_max_vt.unit,
-                                                                                      "1f")[-2])
-        winddir_places = int(self.generator.skin_dict['Units']['StringFormats'].get(winddir_dict['vecdir'].unit,
-                                                                                    "1f")[-2])
-        rain_places = int(self.generator.skin_dict['Units']['StringFormats'].get(rain_sum_vt.unit,
-                                                                                 "1f")[-2])
-        radiation_places = int(self.generator.skin_dict['Units']['StringFormats'].get(radiation_dict['max'].unit,
-                                                                                      "1f")[-2])
-        uv_places = int(self.generator.skin_dict['Units']['StringFormats'].get(uv_dict['max'].unit,
-                                                                               "1f")[-2])
-
-        # get our time vector in ms
-        time_ms = [float(x) * 1000 for x in outtemp_time_vt[0]]
-
-        # round our values from our ValueTuples
-        outtemp_min_round = [round_none(x, temp_places) for x in outtemp_min_vt.value]
-        outtemp_max_round = [round_none(x, temp_places) for x in outtemp_max_vt.value]
-        outtemp_avg_round = [round_none(x, temp_places) for x in outtemp_avg_vt.value]
-        # round our appTemp values, if we don't have any then set it to None
-        try:
-            apptemp_min_round = [round_none(x, temp_places) for x in apptemp_min_vt.value]
-            apptemp_max_round = [round_none(x, temp_places) for x in apptemp_max_vt.value]
-            apptemp_avg_round = [round_none(x, temp_places) for x in apptemp_avg_vt.value]
-        except TypeError:
-            apptemp_min_round = None
-            apptemp_max_round = None
-            apptemp_avg_round = None
-        windchill_avg_round = [round_none(x, temp_places) for x in windchill_avg_vt.value]
-        heatindex_avg_round = [round_none(x, temp_places) for x in heatindex_avg_vt.value]
-        outhumidity_min_round = [round_none(x, outhumidity_places) for x in outhumidity_dict['min'].value]
-        outhumidity_max_round = [round_none(x, outhumidity_places) for x in outhumidity_dict['max'].value]
-        outhumidity_avg_round = [round_none(x, outhumidity_places) for x in outhumidity_dict['avg'].value]
-        barometer_min_round = [round_none(x, barometer_places) for x in barometer_min_vt.value]
-        barometer_max_round = [round_none(x, barometer_places) for x in barometer_max_vt.value]
-        barometer_avg_round = [round_none(x, barometer_places) for x in barometer_avg_vt.value]
-        wind_max_round = [round_none(x, wind_places) for x in wind_max_vt.value]
-        wind_avg_round = [round_none(x, wind_places) for x in wind_avg_vt.value]
-        windspeed_max_round = [round_none(x, windspeed_places) for x in windspeed_max_vt.value]
-        windspeed_avg_round = [round_none(x, windspeed_places) for x in windspeed_avg_vt.value]
-        winddir_round = [round_none(x, winddir_places) for x in winddir_dict['vecdir'].value]
-        rain_sum_round = [round_none(x, rain_places) for x in rain_sum_vt.value]
-        radiation_max_round = [round_none(x, radiation_places) for x in radiation_dict['max'].value]
-        radiation_avg_round = [round_none(x, radiation_places) for x in radiation_dict['avg'].value]
-        uv_max_round = [round_none(x, uv_places) for x in uv_dict['max'].value]
-        uv_avg_round = [round_none(x, uv_places) for x in uv_dict['avg'].value]
-
-        # produce our JSON strings
-        outtemp_min_max_json = json.dumps(list(zip(time_ms, outtemp_min_round, outtemp_max_round)))
-        outtemp_avg_json = json.dumps(list(zip(time_ms, outtemp_avg_round)))
-        # appTemp. If we don't have any source data then set our JSON string to
-        # None
-        if apptemp_min_round is not None and apptemp_max_round is not None:
-            apptemp_min_max_json = json.dumps(list(zip(time_ms, apptemp_min_round, apptemp_max_round)))
+        # get our time vector in ms, our timestamps are integers so keep them
+        # as integers
+        time_ms = [x * 1000 for x in outtemp_time_vt[0]]
+
+        # Set up our JSON strings, they are not generated until a template
+        # uses them and each is converted, rounded and formatted in a single
+        # pass. If we don't have any appTemp source data the appTemp JSON
+        # strings are set to None.
+        outtemp_min_max_json = LazyJson(self.json_convert_round,
+                                        [outtemp_dict['min'], outtemp_dict['max']], time_ms)
+        outtemp_avg_json = LazyJson(self.json_convert_round, [outtemp_dict['avg']], time_ms)
+        if apptemp_dict is not None:
+            apptemp_min_max_json = LazyJson(self.json_convert_round,
+                                            [apptemp_dict['min'], apptemp_dict['max']], time_ms)
+            apptemp_min_json = LazyJson(self.json_convert_round, [apptemp_dict['min']], time_ms)
+            apptemp_max_json = LazyJson(self.json_convert_round, [apptemp_dict['max']], time_ms)
+            apptemp_avg_json = LazyJson(self.json_convert_round, [apptemp_dict['avg']], time_ms)
         else:
             apptemp_min_max_json = None
-        if apptemp_min_round is not None:
-            apptemp_min_json = json.dumps(list(zip(time_ms, apptemp_min_round)))
-        else:
             apptemp_min_json = None
-        if apptemp_max_round is not None:
-            apptemp_max_json = json.dumps(list(zip(time_ms, apptemp_max_round)))
-        else:
             apptemp_max_json = None
-        if apptemp_avg_round is not None:
-            apptemp_avg_json = json.dumps(list(zip(time_ms, apptemp_avg_round)))
-        else:
             apptemp_avg_json = None
-        windchill_avg_json = json_zip_vectors([windchill_avg_round], time_ms)
-        heatindex_avg_json = json_zip_vectors([heatindex_avg_round], time_ms)
-        outhumidity_min_max_json = json_zip_vectors([outhumidity_min_round, outhumidity_max_round], time_ms)
-        outhumidity_min_json = json_zip_vectors([outhumidity_min_round], time_ms)
-        outhumidity_max_json = json_zip_vectors([outhumidity_max_round], time_ms)
-        outhumidity_avg_json = json_zip_vectors([outhumidity_avg_round], time_ms)
-        barometer_min_max_json = json_zip_vectors([barometer_min_round, barometer_max_round], time_ms)
-        barometer_min_json = json_zip_vectors([barometer_min_round], time_ms)
-        barometer_max_json = json_zip_vectors([barometer_max_round], time_ms)
-        barometer_avg_json = json_zip_vectors([barometer_avg_round], time_ms)
-        wind_max_json = json_zip_vectors([wind_max_round], time_ms)
-        wind_avg_json = json_zip_vectors([wind_avg_round], time_ms)
-        windspeed_max_json = json_zip_vectors([windspeed_max_round], time_ms)
-        windspeed_avg_json = json_zip_vectors([windspeed_avg_round], time_ms)
-        winddir_json = json_zip_vectors([winddir_round], time_ms)
-        rain_sum_json = json_zip_vectors([rain_sum_round], time_ms)
-        radiation_max_json = json_zip_vectors([radiation_max_round], time_ms)
-        radiation_avg_json = json_zip_vectors([radiation_avg_round], time_ms)
-        uv_max_json = json_zip_vectors([uv_max_round], time_ms)
-        uv_avg_json = json_zip_vectors([uv_avg_round], time_ms)
+        windchill_avg_json = LazyJson(self.json_convert_round, [windchill_dict['avg']], time_ms)
+        heatindex_avg_json = LazyJson(self.json_convert_round, [heatindex_dict['avg']], time_ms)
+        outhumidity_min_max_json = LazyJson(self.json_convert_round,
+                                            [outhumidity_dict['min'], outhumidity_dict['max']], time_ms)
+        outhumidity_min_json = LazyJson(self.json_convert_round, [outhumidity_dict['min']], time_ms)
+        outhumidity_max_json = LazyJson(self.json_convert_round, [outhumidity_dict['max']], time_ms)
+        outhumidity_avg_json = LazyJson(self.json_convert_round, [outhumidity_dict['avg']], time_ms)
+        barometer_min_max_json = LazyJson(self.json_convert_round,
+                                          [barometer_dict['min'], barometer_dict['max']], time_ms)
+        barometer_min_json = LazyJson(self.json_convert_round, [barometer_dict['min']], time_ms)
+        barometer_max_json = LazyJson(self.json_convert_round, [barometer_dict['max']], time_ms)
+        barometer_avg_json = LazyJson(self.json_convert_round, [barometer_dict['avg']], time_ms)
+        wind_max_json = LazyJson(self.json_convert_round, [wind_dict['max']], time_ms)
+        wind_avg_json = LazyJson(self.json_convert_round, [wind_dict['avg']], time_ms)
+        windspeed_max_json = LazyJson(self.json_convert_round, [windspeed_dict['max']], time_ms)
+        windspeed_avg_json = LazyJson(self.json_convert_round, [windspeed_dict['avg']], time_ms)
+        winddir_json = LazyJson(self.json_convert_round, [wind_dict['vecdir']], time_ms)
+        rain_sum_json = LazyJson(self.json_convert_round, [rain_dict['sum']], time_ms)
+        radiation_max_json = LazyJson(self.json_convert_round, [radiation_dict['max']], time_ms)
+        radiation_avg_json = LazyJson(self.json_convert_round, [radiation_dict['avg']], time_ms)
+        uv_max_json = LazyJson(self.json_convert_round, [uv_dict['max']], time_ms)
+        uv_avg_json = LazyJson(self.json_convert_round, [uv_dict['avg']], time_ms)
 
         # put into a dictionary to return
         search_list_extension = {'outtemp_min_max_json': outtemp_min_max_json,
@@ -790,7 +783,7 @@ class HighchartsYear(HighchartsDaySummarySearchList):
                                  'uv_max_json': uv_max_json,
                                  'uv_avg_json': uv_avg_json,
                                  'utcOffset': utc_offset,
-                                 'yearPlotStart': t_span.start * 1000,
+                                 'yearPlotStart': int(t_span.start) * 1000,
                                  'yearPlotEnd': t_span.stop * 1000}
 
         t2 = time.time()
@@ -861,18 +854,18 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
             # we could not convert an element so use the default
             speedfactor = self.default_speedfactor
         # check that we have sufficient elements in the speedfactor list and
-        # that their values are acceptable, if not use the default
-        if len(speedfactor) != 7 or max(speedfactor) > 1.0 or min(speedfactor) < 0.0:
+        # that their values are acceptable and in ascending order, if not use
+        # the default
+        if len(speedfactor) != 7 or max(speedfactor) > 1.0 or min(speedfactor) < 0.0 \
+                or speedfactor != sorted(speedfactor):
             speedfactor = self.default_speedfactor
         self.speedfactor = speedfactor
         # get petal colours, if not defined then set some defaults
         petal_colours = windrose_dict.get('petal_colors',
                                           self.default_petal_colours)
         petal_colours = self.default_petal_colours if len(petal_colours) != 7 else petal_colours
-        for x in range(len(petal_colours) - 1):
-            if petal_colours[x][0:2] == '0x':
-                petal_colours[x] = '#' + petal_colours[x][2:]
-        self.petal_colours = petal_colours
+        self.petal_colours = [''.join(['#', c[2:]]) if c[0:2] == '0x' else c
+                              for c in petal_colours]
         # get the number of petals, if not defined then set a default
         petals = weeutil.weeutil.to_int(windrose_dict.get('petals',
                                                           self.default_petals))
@@ -900,48 +893,75 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
         # aggregate wind speeds to be 'calm' (or 0)
         self.calm_limit = float(windrose_dict.get('calm_limit',
                                                   self.default_calm_limit))
+        # get the plot periods, if not defined then set a default
+        self.period_list = option_as_list(windrose_dict.get('period', ['day']))
+        # get the unit labels we use
+        self.unit_labels = dict(generator.skin_dict['Units']['Labels'])
         # and finally save our config dict
         self.windrose_dict = windrose_dict
 
-    def calc_windrose(self, timespan, db_lookup, period):
-        """Function to calculate windrose JSON data for a given timespan."""
+    def calc_windrose(self, timespan, db_lookup, period, archive_period=None):
+        """Function to calculate windrose JSON data for a given timespan.
+
+        If archive_period is longer than period the archive vectors for
+        archive_period are obtained and the vectors for period sliced from
+        them, this allows the archive data for a number of periods ending at
+        the same time to be obtained from the database once only.
+        """
 
         # initialise a dictionary for our results
         wr_dict = {}
+        # get the database manager to use
+        db_manager = db_lookup()
         if period <= 604800:
-            # week or less, get our vectors from archive via xtypes.get_series()
+            # Week or less, get our vectors from archive. Where our speed and
+            # direction are archive fields obtain them both with a single
+            # query, otherwise they will be obtained via xtypes.get_series().
+            if archive_period is None or archive_period < period:
+                archive_period = period
+            t_span = TimeSpan(timespan.stop - archive_period + 1, timespan.stop)
+            prefetch_archive_series([self.source, self.dir], t_span, db_manager)
             # get our wind speed vector
-            t_span = TimeSpan(timespan.stop - period + 1, timespan.stop)
-            (_x_vt, time_vec_speed_vt, speed_vec_vt) = weewx.xtypes.get_series(self.source,
-                                                                               t_span,
-                                                                               db_lookup())
+            (_x_vt, time_vec_speed_vt, speed_vec_vt) = get_series_cached(self.source,
+                                                                         t_span,
+                                                                         db_manager)
+            # get our wind direction vector
+            (_x_vt, time_vec_dir_stop_vt, direction_vec_vt) = get_series_cached(self.dir,
+                                                                                t_span,
+                                                                                db_manager)
+            if archive_period > period:
+                # our vectors cover a longer period than we need, keep only
+                # those elements that a query for our period would have
+                # returned, ie those with a stop time after the start of our
+                # period
+                _start_ts = timespan.stop - period + 1
+                _i = bisect_right(time_vec_speed_vt.value, _start_ts)
+                speed_vec_vt = ValueTuple(speed_vec_vt.value[_i:],
+                                          speed_vec_vt.unit,
+                                          speed_vec_vt.group)
+                _i = bisect_right(time_vec_dir_stop_vt.value, _start_ts)
+                direction_vec_vt = ValueTuple(direction_vec_vt.value[_i:],
+                                              direction_vec_vt.unit,
+                                              direction_vec_vt.group)
             # convert our speed vector
             speed_vec_vt = self.generator.converter.convert(speed_vec_vt)
-            # get our wind direction vector
-            t_span = TimeSpan(timespan.stop-period + 1, timespan.stop)
-            (_x_vt, time_vec_dir_stop_vt, direction_vec_vt) = weewx.xtypes.get_series(self.dir,
-                                                                               t_span,
-                                                                               db_lookup())
         else:
-            # get our vectors from daily summaries using custom getStatsVectors
-            # get our data tuples for speed
+            # Get our vectors from daily summaries using custom
+            # getStatsVectors. Our speed and direction come from the same daily
+            # summary so get our data tuples for both with a single query.
             t_span = TimeSpan(timespan.stop - period, timespan.stop)
-            (time_vec_speed_vt, speed_dict) = self.get_day_summary_vectors(db_lookup(),
-                                                                           'wind',
-                                                                           t_span,
-                                                                           ['avg'])
+            (time_vec_speed_vt, wind_dict) = self.get_day_summary_vectors(db_manager,
+                                                                          'wind',
+                                                                          t_span,
+                                                                          ['avg', 'vecdir'])
             # get our speed vector ValueTuple out of the dictionary and convert
             # it
-            speed_vec_vt = self.generator.converter.convert(speed_dict['avg'])
-            # get our data tuples for direction
-            (time_vec_dir_vt, dir_dict) = self.get_day_summary_vectors(db_lookup(),
-                                                                       'wind',
-                                                                       t_span,
-                                                                       ['vecdir'])
-            # get our vector ValueTuple out of the dictionary, no need to convert
-            direction_vec_vt = dir_dict['vecdir']
+            speed_vec_vt = self.generator.converter.convert(wind_dict['avg'])
+            # get our direction vector ValueTuple out of the dictionary, no
+            # need to convert
+            direction_vec_vt = wind_dict['vecdir']
         # get a string with our speed units
-        speed_units_str = self.generator.skin_dict['Units']['Labels'].get(speed_vec_vt.unit).strip()
+        speed_units_str = self.unit_labels.get(speed_vec_vt.unit).strip()
         # to get a better display we will set our upper speed to a multiple of 10
         # find maximum speed from our data
         # it is possible there could be a None value in speed_vec_vt.value so
@@ -955,17 +975,13 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
             max_speed = 10
         # set upper speed range for our plot
         max_speed_range = (int(max_speed/10.0) + 1) * 10
-        # setup a list to hold the cutoff speeds for our stacked columns on our
-        # wind rose.
-        speed_list = [0 for x in range(7)]
+        # get the cutoff speeds for our stacked columns on our wind rose and
+        # the speed range text for each of our speed bands
+        (speed_list, band_labels) = get_speed_bands(max_speed_range, self.speedfactor)
         # setup a list to hold the legend item text for each of our speed bands
         # (or legend labels)
-        legend_labels = ["" for x in range(7)]
-        legend_no_labels = ["" for x in range(7)]
-        i = 1
-        while i < 7:
-            speed_list[i] = self.speedfactor[i] * max_speed_range
-            i += 1
+        legend_labels = [""] * 7
+        legend_no_labels = [""] * 7
         # setup 2D list for wind direction
         # wind_bin[0][0..self.petals] holds the calm or 0 speed counts for each
         # of self.petals (usually 16) compass directions ([0][0] for N, [0][1]
@@ -973,21 +989,9 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
         # wind_bin[1][0..self.petals] holds the 1st speed band speed counts for
         # each of self.petals (usually 16) compass directions ([1][0] for
         # N, [1][1] for ENE (or NE oe E depending self.petals) etc).
-        wind_bin = [[0 for x in range(self.petals)] for x in range(7)]
-        # Setup a list to hold sample count (speed>0) for each direction. Used
-        # to aid in bullseye scaling
-        dir_bin = [0 for x in range(self.petals)]
-        # setup list to hold obs counts for each speed range (irrespective of
-        # direction)
-        # [0] = calm
-        # [1] = >0 and < 1st speed
-        # [2] = >1st speed and <2nd speed
-        # .....
-        # [6] = >4th speed and <5th speed
-        # [7] = >5th speed and <6th speed
-        speed_bin = [0 for x in range(7)]
+        wind_bin = [[0] * self.petals for x in range(7)]
         # how many obs do we have?
-        samples = len(time_vec_speed_vt.value)
+        samples = len(speed_vec_vt.value)
         # calc factor to be applied to convert counts to %
         pcent_factor = 100.0/samples
         # Loop through each sample and increment direction counts
@@ -995,41 +999,42 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
         # direction is counted as 'calm' (or 0 speed) and
         # (by definition) no direction and are plotted in the
         # 'bullseye' on the plot
-        i = 0
-        while i < samples:
-            if (speed_vec_vt.value[i] is None) or (direction_vec_vt.value[i] is None):
-                speed_bin[0] += 1
+        # The speed band for a sample is the number of band lower limits
+        # (0, speed_list[1] .. speed_list[5]) that are less than the sample
+        # speed, speed_list is non-decreasing so bisect_left() gives us this
+        # directly. Each petal covers 360/petals degrees centred on its
+        # direction so offset the direction by half a petal before working out
+        # the petal. The loop below is executed once per sample so hoist the
+        # attribute lookups and invariants it uses into locals.
+        petals = self.petals
+        petal_width = 360.0 / petals
+        half_petal_width = petal_width / 2.0
+        calm_limit = self.calm_limit
+        band_limits = (0,) + speed_list[1:6]
+        calm_count = 0
+        for (speed, direction) in zip(speed_vec_vt.value, direction_vec_vt.value):
+            if speed is None or direction is None or speed <= calm_limit:
+                calm_count += 1
             else:
-                bin_num = int((direction_vec_vt.value[i]+11.25)/22.5) % self.petals
-                if speed_vec_vt.value[i] <= self.calm_limit:
-                    speed_bin[0] += 1
-                elif speed_vec_vt.value[i] > speed_list[5]:
-                    wind_bin[6][bin_num] += 1
-                elif speed_vec_vt.value[i] > speed_list[4]:
-                    wind_bin[5][bin_num] += 1
-                elif speed_vec_vt.value[i] > speed_list[3]:
-                    wind_bin[4][bin_num] += 1
-                elif speed_vec_vt.value[i] > speed_list[2]:
-                    wind_bin[3][bin_num] += 1
-                elif speed_vec_vt.value[i] > speed_list[1]:
-                    wind_bin[2][bin_num] += 1
-                elif speed_vec_vt.value[i] > 0:
-                    wind_bin[1][bin_num] += 1
-                else:
-                    wind_bin[0][bin_num] += 1
-            i += 1
-        i = 0
+                petal = int((direction + half_petal_width) / petal_width) % petals
+                wind_bin[bisect_left(band_limits, speed)][petal] += 1
+        # get the obs count for each speed range (irrespective of direction)
+        # from our raw counts
+        # [0] = calm
+        # [1] = >0 and < 1st speed
+        # [2] = >1st speed and <2nd speed
+        # .....
+        # [6] = >5th speed and <6th speed
+        speed_bin = [sum(band) for band in wind_bin]
+        speed_bin[0] += calm_count
         # Our wind_bin values are counts, need to change them to % of total
-        # samples and round them to self.precision decimal places. At the same
-        # time, to help with bullseye scaling lets count how many samples we
-        # have (of any speed>0) for each direction
-        while i < 7:
-            j = 0
-            while j < self.petals:
-                dir_bin[j] += wind_bin[i][j]
-                wind_bin[i][j] = round(pcent_factor * wind_bin[i][j], self.precision)
-                j += 1
-            i += 1
+        # samples and round them to self.precision decimal places. Before we
+        # do, to help with bullseye scaling lets count how many samples we
+        # have (of any speed>0) for each direction.
+        dir_bin = [sum(petal) for petal in zip(*wind_bin)]
+        precision = self.precision
+        wind_bin = [[round(pcent_factor * count, precision) for count in band]
+                    for band in wind_bin]
         # Bullseye diameter is specified in skin.conf as a % of y axis range on
         # polar plot. To make space for bullseye we start the y axis at a small
         # -ve number. We supply Highcharts with the -ve value in y axis units
@@ -1043,78 +1048,37 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
         max_y_axis = 10.0 * (1 + int(max_dir_percent/10.0))
         # our bullseye radius in y axis units
         bullseye_radius = max_y_axis * self.bullseye_size/100.0
-        # Need to get the counts for each speed band. To get this go through
-        # each speed band and then through each petal adding the petal speed
-        # 'count' to our total for each band and add the speed band counts to
-        # the relevant speed_bin. Values are already %.
-        j = 0
-        while j < 7:
-            i = 0
-            while i < self.petals:
-                speed_bin[j] += wind_bin[j][i]
-                i += 1
-            j += 1
         # Determine our legend labels. Need to determine actual speed band
-        # ranges, add unit and if necessary add % for that band
-        calm_percent_str = ''.join([str(round(speed_bin[0] * pcent_factor, self.precision)),
-                                    "%"])
+        # ranges, add unit and if necessary add % for that band. Our speed band
+        # totals are counts so convert them to % of total samples.
+        band_percent = [str(round(pcent_factor * count, precision)) for count in speed_bin]
+        calm_percent_str = ''.join([band_percent[0], "%"])
         if self.show_band_percent:
             legend_labels[0] = ''.join(["Calm (", calm_percent_str, ")"])
             legend_no_labels[0] = ''.join(["Calm (", calm_percent_str, ")"])
         else:
             legend_labels[0] = "Calm"
             legend_no_labels[0] = "Calm"
-        i = 1
-        while i < 7:
+        for i in range(1, 7):
             if self.show_band_percent:
-                legend_labels[i] = ''.join([str(round_int(speed_list[i - 1], 0)),
-                                            "-", str(round_int(speed_list[i], 0)),
-                                            speed_units_str, " (",
-                                            str(round(speed_bin[i] * pcent_factor, self.precision)),
-                                            "%)"])
-                legend_no_labels[i] = ''.join([str(round_int(speed_list[i - 1], 0)),
-                                               "-", str(round_int(speed_list[i], 0)),
-                                               " (",
-                                               str(round(speed_bin[i] * pcent_factor, self.precision)),
-                                               "%)"])
+                band_percent_str = ''.join([" (", band_percent[i], "%)"])
+                legend_labels[i] = ''.join([band_labels[i], speed_units_str, band_percent_str])
+                legend_no_labels[i] = ''.join([band_labels[i], band_percent_str])
             else:
-                legend_labels[i] = ''.join([str(round_int(speed_list[i - 1], 0)),
-                                            "-", str(round_int(speed_list[i], 0)),
-                                            speed_units_str])
-                legend_no_labels[i] = ''.join([str(round_int(speed_list[i - 1], 0)),
-                                               "-", str(round_int(speed_list[i], 0))])
-            i += 1
-        # build up our JSON result string
-        json_result_str = ''.join(['[{"name": "', legend_labels[6],
-                                   '", "data": ', json.dumps(wind_bin[6]),
-                                   '}'])
-        json_result_no_label_str = ''.join(['[{"name": "', legend_no_labels[6],
-                                            '", "data": ', json.dumps(wind_bin[6]),
-                                            '}'])
-        i = 5
-        while i > 0:
-            json_result_str = ''.join([json_result_str, ', {"name": "',
-                                       legend_labels[i], '", "data": ',
-                                       json.dumps(wind_bin[i]), '}'])
-            json_result_no_label_str = ''.join([json_result_no_label_str,
-                                                ', {"name": "',
-                                                legend_no_labels[i],
-                                                '", "data": ',
-                                                json.dumps(wind_bin[i]), '}'])
-            i -= 1
-        # add ] to close our json array
-        json_result_str = ''.join([json_result_str, ']'])
-
-        # fill our results dictionary
-        wr_dict['windrosejson'] = json_result_str
-        json_result_no_label_str = ''.join([json_result_no_label_str, ']'])
-        wr_dict['windrosenolabeljson'] = json_result_no_label_str
+                legend_labels[i] = ''.join([band_labels[i], speed_units_str])
+                legend_no_labels[i] = band_labels[i]
+        # build up our JSON result strings, the speed bands are listed from
+        # highest to lowest
+        wr_dict['windrosejson'] = json_dumps([{'name': legend_labels[i], 'data': wind_bin[i]}
+                                              for i in range(6, 0, -1)])
+        wr_dict['windrosenolabeljson'] = json_dumps([{'name': legend_no_labels[i], 'data': wind_bin[i]}
+                                                     for i in range(6, 0, -1)])
         # Get our xAxis categories in json format
-        wr_dict['xAxisCategoriesjson'] = json.dumps(self.directions)
+        wr_dict['xAxisCategoriesjson'] = json_dumps(self.directions)
         # Get our yAxis min/max settings
         wr_dict['yAxisjson'] = '{"max": %f, "min": %f}' % (max_y_axis, -1.0 * bullseye_radius)
         # Get our stacked column colours in json format
-        wr_dict['coloursjson'] = json.dumps(self.petal_colours)
+        wr_dict['coloursjson'] = json_dumps(self.petal_colours)
         # Manually construct our plot title in json format
         wr_dict['titlejson'] = ''.join(["[\"", self.title, "\"]"])
         # Manually construct our legend title in json format
@@ -1140,7 +1104,7 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
                                                                                    calm_percent_str)
         return wr_dict
 
-    def get_extension_list(self, timespan, db_lookup):
+    def calc_extension_list(self, timespan, db_lookup):
         """Generate the JSON vectors and return as a list of dictionaries.
 
         Parameters:
@@ -1155,32 +1119,24 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
 
         t1 = time.time()
 
-        # look for plot period, if not defined then set a default
-        _period_list = option_as_list(self.windrose_dict.get('period', ['day']))
+        # get our plot periods
+        _period_list = self.period_list
         if _period_list is None:
             return None
         elif hasattr(_period_list, '__iter__') and len(_period_list) > 0:
             sle_dict = {}
+            # list of (SLE name, period) tuples for the windroses we generate
+            windroses = []
             for _period_raw in _period_list:
                 _period = _period_raw.strip().lower()
                 if _period == 'day':
                     # normally this will be 86400 sec but it could be a daylight
                     # savings changeover day
-                    # first get our stop time as a dt object so we can do some
-                    # dt maths
-                    _stop_dt = datetime.datetime.fromtimestamp(timespan.stop)
-                    # then go back 1 day to get our start
-                    _start_dt = _stop_dt - datetime.timedelta(days=1)
-                    period = time.mktime(_stop_dt.timetuple()) - time.mktime(_start_dt.timetuple())
+                    period = get_period(timespan.stop, days=1)
                 elif _period == 'week':
                     # normally this will be 604800 sec but it could be a daylight
                     # savings changeover week
-                    # first get our stop time as a dt object so we can do some
-                    # dt maths
-                    _stop_dt = datetime.datetime.fromtimestamp(timespan.stop)
-                    # then go back 7 days to get our start
-                    _start_dt = _stop_dt - datetime.timedelta(days=7)
-                    period = time.mktime(_stop_dt.timetuple()) - time.mktime(_start_dt.timetuple())
+                    period = get_period(timespan.stop, days=7)
                 elif _period == 'month':
                     # our start time is midnight one month ago
                     # get a time object for midnight
@@ -1213,12 +1169,7 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
                     except (ValueError, TypeError):
                         # default to 1 day but it could be a daylight savings
                         # changeover day
-                        # first get our stop time as a dt object so we can do some
-                        # dt maths
-                        _stop_dt = datetime.datetime.fromtimestamp(timespan.stop)
-                        # then go back 1 day to get our start
-                        _start_dt = _stop_dt - datetime.timedelta(days=1)
-                        period = time.mktime(_stop_dt.timetuple()) - time.mktime(_start_dt.timetuple())
+                        period = get_period(timespan.stop, days=1)
                 # set any aggregation types/intervals if we have a period > 1 week
                 if period >= 2678400:
                     # nominal month
@@ -1230,11 +1181,18 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
                     # nominal week:
                     if self.agg_interval is None:
                         self.agg_interval = 3600
-                # can now get our windrose data
                 _suffix = str(_period) if _period in ['day', 'week', 'month', 'year', 'all', 'alltime'] else str(period)
-                sle_dict[''.join(['wr', _suffix])] = self.calc_windrose(timespan,
-                                                                        db_lookup,
-                                                                        period)
+                windroses.append((''.join(['wr', _suffix]), period))
+            # The windroses for periods of a week or less use archive data
+            # ending at the same time, so obtain the archive data for the
+            # longest of these periods and use it for each of them.
+            archive_period = max([p for (n, p) in windroses if p <= 604800] or [None])
+            # can now get our windrose data
+            for (name, period) in windroses:
+                sle_dict[name] = self.calc_windrose(timespan,
+                                                    db_lookup,
+                                                    period,
+                                                    archive_period)
         t2 = time.time()
         if weewx.debug >= 2:
             logdbg("HighchartsWindRose SLE executed in %0.3f seconds" % (t2 - t1))
@@ -1242,11 +1200,343 @@ class HighchartsWindRose(HighchartsDaySummarySearchList):
         return [sle_dict]
 
 
+# ============================================================================
+#                              class LazyJson
+# ============================================================================
+
+class LazyJson(object):
+    """A JSON format string that is only generated when first used.
+
+    Cheetah converts a search list value to a string when a template uses it,
+    so a LazyJson object can be used in place of a JSON string to defer
+    generating the string until (and unless) a template uses it. The string
+    is generated by calling func(*args) and is then kept for any further use.
+    """
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+        self.value = None
+
+    def __str__(self):
+        if self.value is None:
+            self.value = self.func(*self.args)
+            # we no longer need our source data
+            self.func = None
+            self.args = None
+        return self.value
+
+    # Cheetah under python 2 may convert values using unicode()
+    __unicode__ = __str__
+
+
 # ==============================================================================
 #                             Utility functions
 # ==============================================================================
 
 
+def day_summary_plan(obs_type, agg_list):
+    """Compile the query and calculations needed for a set of daily summary aggregates.
+
+    Returns a tuple (sql_str, singles, fused) where sql_str is the SQL query
+    to be used (with start and stop timestamp parameters), singles is a list
+    of (vector index, extractor) tuples for each aggregate calculated on its
+    own and fused is None or a tuple (vecavg index, vecdir index, column
+    indices) if the vecavg and vecdir aggregates are to be calculated
+    together. Vector indices are positions in agg_list.
+
+    The result depends only on obs_type and agg_list so is cached, a dict is
+    used rather than functools.lru_cache to retain Python 2 compatibility.
+    """
+
+    key = (obs_type, tuple(agg_list))
+    try:
+        return _day_summary_plan_cache[key]
+    except KeyError:
+        pass
+    # Only select what we need to calculate the aggregates we have been
+    # asked for. dateTime is always required and is always the first field.
+    sql_fields = ['dateTime']
+    for agg in agg_list:
+        for expr in DAY_SUMMARY_SQL.get(agg, ()):
+            if expr not in sql_fields:
+                sql_fields.append(expr)
+    # the position of each field in our query result
+    _pos = dict((expr, i) for i, expr in enumerate(sql_fields))
+    # get our interpolation dictionary for the query
+    inter_dict = {'table_name': 'archive_day_%s' % obs_type,
+                  'sql_fields': ','.join(sql_fields)}
+    # put together our SQL query string, our vectors must be in date order
+    # so ask for the records in dateTime order, this also lets the database
+    # use a range scan of the dateTime primary key
+    sql_str = "SELECT %(sql_fields)s FROM %(table_name)s " \
+              "WHERE dateTime >= ? AND dateTime < ? ORDER BY dateTime ASC" % inter_dict
+    singles = []
+    fused = None
+    # vecavg and vecdir are both calculated from the same mean x and y
+    # components so if both are required calculate them together
+    fuse_vec = 'vecavg' in agg_list and 'vecdir' in agg_list
+    for i, agg in enumerate(agg_list):
+        idx = [_pos[expr] for expr in DAY_SUMMARY_SQL.get(agg, ())]
+        if fuse_vec and agg == 'vecavg':
+            fused = (i, list(agg_list).index('vecdir'), idx)
+        elif fuse_vec and agg == 'vecdir':
+            continue
+        else:
+            singles.append((i, day_summary_extractor(agg, idx)))
+    _plan = (sql_str, singles, fused)
+    _day_summary_plan_cache[key] = _plan
+    return _plan
+
+
+def day_summary_extractor(agg, idx):
+    """Return a function that calculates an aggregate vector from daily summaries.
+
+    The returned function accepts a sequence of daily summary columns, each
+    column being a sequence of the values of one field across a batch of
+    records, and returns a sequence containing the value of aggregate 'agg'
+    (or None) for each record. 'idx' is a sequence giving the position of the
+    column for each of the SQL expressions in DAY_SUMMARY_SQL[agg].
+    """
+
+    if agg in ('min', 'max', 'sum', 'gustdir', 'avg'):
+        # the database has done all the work, the column is the vector
+        i = idx[0]
+        return lambda cols: cols[i]
+    elif agg in ('mintime', 'maxtime', 'count'):
+        i = idx[0]
+
+        def extract(cols):
+            col = cols[i]
+            # most batches have a value for every record, if so we can skip
+            # the per element check
+            if None not in col and 0 not in col:
+                return list(map(int, col))
+            return [int(v) if v else None for v in col]
+        return extract
+    elif agg == 'rms':
+        # the database returns the mean of the squares, bind sqrt locally to
+        # save a global and attribute lookup for every element
+        i = idx[0]
+        _sqrt = math.sqrt
+
+        def extract(cols):
+            col = cols[i]
+            if None not in col:
+                return list(map(_sqrt, col))
+            return [_sqrt(v) if v is not None else None for v in col]
+        return extract
+    elif agg == 'vecavg':
+        # the database returns the mean x and y components, the vector average
+        # is the magnitude of the mean vector
+        x, y = idx
+        _hypot = math.hypot
+
+        def extract(cols):
+            if None not in cols[x]:
+                return list(map(_hypot, cols[x], cols[y]))
+            return [_hypot(xv, yv) if xv is not None else None
+                    for xv, yv in zip(cols[x], cols[y])]
+        return extract
+    elif agg == 'vecdir':
+        # the database returns the mean x and y components, their direction
+        # is the direction of the vector sum
+        x, y = idx
+        return lambda cols: list(map(vector_direction, cols[x], cols[y]))
+    # if we do not know the aggregate then it is None for every record
+    return lambda cols: [None] * len(cols[0])
+
+
+def day_summary_step(extractor, extend):
+    """Return a function that calculates an aggregate and extends its vector.
+
+    'extractor' is a function as returned by day_summary_extractor() and
+    'extend' is the extend method of the aggregate vector.
+    """
+
+    return lambda cols: extend(extractor(cols))
+
+
+def day_summary_vector_step(idx, avg_extend, dir_extend):
+    """Return a function that calculates both the vecavg and vecdir aggregates.
+
+    The vecavg and vecdir aggregates are both calculated from the mean x and y
+    components of a vector. Calculating them together means the components
+    are read and checked for None once only. 'idx' is a sequence giving the
+    position of the x and y component columns and 'avg_extend' and
+    'dir_extend' are the extend methods of the vecavg and vecdir vectors.
+    """
+
+    x, y = idx
+    _hypot = math.hypot
+
+    def step(cols):
+        # The x and y components are both None when count is 0. Most batches
+        # have no such records so check the batch once and if there are none
+        # both vectors can be calculated without any per element checks.
+        if None not in cols[x]:
+            avg_extend(map(_hypot, cols[x], cols[y]))
+            dir_extend(map(vector_direction, cols[x], cols[y]))
+            return
+        _avg = []
+        _dir = []
+        avg_append = _avg.append
+        dir_append = _dir.append
+        for xv, yv in zip(cols[x], cols[y]):
+            if xv is None:
+                avg_append(None)
+                dir_append(None)
+            else:
+                avg_append(_hypot(xv, yv))
+                dir_append(vector_direction(xv, yv))
+        avg_extend(_avg)
+        dir_extend(_dir)
+    return step
+
+
+def vector_direction(xsum, ysum, _atan2=math.atan2, _degrees=math.degrees):
+    """Calculate a vector direction in degrees from its x and y sums.
+
+    math.atan2() and math.degrees() are bound as default arguments to save a
+    global and attribute lookup on each call.
+    """
+
+    if xsum == 0.0 and ysum == 0.0:
+        return None
+    elif xsum and ysum:
+        deg = 90.0 - _degrees(_atan2(ysum, xsum))
+        return deg if deg >= 0.0 else deg + 360.0
+    return None
+
+
+def standard_unit_type(std_unit_system, obs_type, agg=None):
+    """Memoized version of weewx.units.getStandardUnitType().
+
+    The same (unit system, obs type, aggregate) combinations are looked up
+    every report cycle so cache the results. A dict is used rather than
+    functools.lru_cache to retain Python 2 compatibility.
+    """
+
+    key = (std_unit_system, obs_type, agg)
+    try:
+        return _unit_type_cache[key]
+    except KeyError:
+        _result = getStandardUnitType(std_unit_system, obs_type, agg)
+        _unit_type_cache[key] = _result
+        return _result
+
+
+def get_series_cached(obs_type, timespan, db_manager,
+                      aggregate_type=None, aggregate_interval=None):
+    """Caching wrapper around weewx.xtypes.get_series().
+
+    Each series is keyed by database, obs type, timespan and aggregation.
+    The same series is often requested more than once in a report cycle (once
+    for each template that uses a SLE) so keep the result rather than query
+    the database again. When a series for a new timespan stop is obtained
+    any series with an earlier stop are discarded, they will not be used
+    again. The cache is limited to SERIES_CACHE_SIZE entries.
+
+    The cached series are shared, callers must not modify them.
+    """
+
+    key = (db_manager.connection.database_name, db_manager.table_name, obs_type,
+           timespan.start, timespan.stop, aggregate_type, aggregate_interval)
+    try:
+        return _series_cache[key]
+    except KeyError:
+        pass
+    _result = weewx.xtypes.get_series(obs_type, timespan, db_manager,
+                                      aggregate_type=aggregate_type,
+                                      aggregate_interval=aggregate_interval)
+    # discard any series that ended before this one, then make sure we
+    # have room for the new series
+    for _key in [k for k in _series_cache if k[4] < timespan.stop]:
+        del _series_cache[_key]
+    if len(_series_cache) >= SERIES_CACHE_SIZE:
+        _series_cache.clear()
+    _series_cache[key] = _result
+    return _result
+
+
+def prefetch_archive_series(obs_types, timespan, db_manager):
+    """Obtain unaggregated series for a number of archive fields in one query.
+
+    weewx.xtypes.get_series() obtains an unaggregated series with a query per
+    obs type. Where a number of series covering the same timespan are
+    required from the same archive the series for any obs types that are
+    archive fields can instead be obtained with a single query. The resulting
+    series are placed in the series cache used by get_series_cached() so
+    subsequent calls to get_series_cached() for those obs types do not need to
+    go to the database. Obs types that are not archive fields are ignored,
+    they will be obtained by get_series_cached() in the usual manner.
+    """
+
+    # only archive fields whose series we do not already have
+    _base_key = (db_manager.connection.database_name, db_manager.table_name)
+    _stamps = (timespan.start, timespan.stop, None, None)
+    columns = [obs for obs in obs_types
+               if obs in db_manager.sqlkeys and _base_key + (obs,) + _stamps not in _series_cache]
+    if not columns:
+        return
+    # dateTime is the primary key so ordering our results by dateTime is
+    # free, it guarantees our series are in time order whatever the database
+    sql_str = "SELECT dateTime, usUnits, `interval`, %s FROM %s " \
+              "WHERE dateTime > ? AND dateTime <= ? ORDER BY dateTime ASC" % (','.join(columns),
+                                                                              db_manager.table_name)
+    # Get our records and transpose them into columns. The weedb cursor
+    # wrappers do not all support fetchall() so iterate over the results.
+    _cols = list(zip(*db_manager.genSql(sql_str, (timespan.start, timespan.stop))))
+    if _cols:
+        (stop_vec, unit_vec, interval_vec) = (list(_cols[0]), _cols[1], _cols[2])
+        std_unit_system = unit_vec[0]
+        # weewx.xtypes.get_series() does not allow the unit system to change
+        # within a series, if it does leave it to get_series() to deal with
+        if unit_vec.count(std_unit_system) != len(unit_vec):
+            return
+        start_vec = [ts - interval * 60 for ts, interval in zip(stop_vec, interval_vec)]
+        data_cols = _cols[3:]
+    else:
+        (start_vec, stop_vec, std_unit_system) = ([], [], None)
+        data_cols = [()] * len(columns)
+    # make room in the cache as get_series_cached() does
+    for _key in [k for k in _series_cache if k[4] < timespan.stop]:
+        del _series_cache[_key]
+    if len(_series_cache) + len(columns) > SERIES_CACHE_SIZE:
+        _series_cache.clear()
+    # add a series for each of our columns to the cache, the time vectors are
+    # common to all of the series
+    start_vt = ValueTuple(start_vec, 'unix_epoch', 'group_time')
+    stop_vt = ValueTuple(stop_vec, 'unix_epoch', 'group_time')
+    for obs, data in zip(columns, data_cols):
+        (unit, unit_group) = standard_unit_type(std_unit_system, obs)
+        _series_cache[_base_key + (obs,) + _stamps] = (start_vt, stop_vt,
+                                                       ValueTuple(list(data), unit, unit_group))
+
+
+def unit_places(skin_dict):
+    """Obtain the number of decimal places to be used for each unit.
+
+    Returns a dictionary keyed by unit containing the number of decimal
+    places given by the precision of the unit's format in the skin
+    [Units][[StringFormats]] stanza, eg 2 for '%.2f' or 10 for '%.10f'. Units
+    with a format that has no precision are omitted.
+    """
+
+    places = {}
+    try:
+        string_formats = skin_dict['Units']['StringFormats']
+    except KeyError:
+        return places
+    for unit, fmt in string_formats.items():
+        try:
+            places[unit] = int(PLACES_RE.search(fmt).group(1))
+        except (AttributeError, TypeError):
+            # the format has no precision or is not a string
+            pass
+    return places
+
+
 def round_none(value, places):
     """Round value to 'places' places but also permit a value of None."""
 
@@ -1258,6 +1548,113 @@ def round_none(value, places):
     return None
 
 
+def round_vector(vector, places, func=None):
+    """Round each element of a vector to 'places' places permitting None.
+
+    If 'func' is not None each non-None element is first passed through
+    func, this allows a vector to be converted and rounded in a single pass.
+    The rounding is done inline rather than via round_none() to avoid a
+    function call per element. If a non-numeric value is encountered fall
+    back to round_none().
+    """
+
+    try:
+        if func is None:
+            return [round(x, places) if x is not None else None for x in vector]
+        return [round(func(x), places) if x is not None else None for x in vector]
+    except TypeError:
+        if func is None:
+            return [round_none(x, places) for x in vector]
+        return [round_none(func(x) if x is not None else None, places) for x in vector]
+
+
+def json_convert_round(list_of_val_t, timestamp_vector, converter, places, conversions):
+    """Convert, round and JSON encode vector ValueTuples in a single pass.
+
+    Returns a JSON formatted string of timestamp, data rows where data is a
+    value from each ValueTuple in list_of_val_t, the ValueTuples must all be
+    in the same unit. Returns '[]' if there is no data and None if the first
+    ValueTuple in list_of_val_t is None.
+
+    The conversion function and target unit are taken from the first
+    ValueTuple using get_cached_conversion(), 'conversions' is the dict used
+    to cache them. Values are rounded to the number of decimal places for the
+    target unit in dict 'places' (1 if the unit is not in the dict). Each
+    value is converted, rounded and formatted by json_zip_round() without
+    intermediate rounded vectors or lists of tuples.
+    """
+
+    if not list_of_val_t or list_of_val_t[0] is None:
+        return None
+    # if we have no data points there is nothing to convert or encode
+    if not list_of_val_t[0].value or not timestamp_vector:
+        return '[]'
+    (func, unit) = get_cached_conversion(converter, list_of_val_t[0], conversions)
+    return json_zip_round([val_t.value for val_t in list_of_val_t], timestamp_vector,
+                          places.get(unit, 1), func)
+
+
+def get_cached_conversion(converter, val_t, conversions):
+    """Get the function and unit used to convert a ValueTuple.
+
+    As get_conversion() but results are cached in the dict 'conversions'
+    keyed by (unit, group).
+    """
+
+    key = (val_t[1], val_t[2])
+    try:
+        return conversions[key]
+    except KeyError:
+        conversions[key] = get_conversion(converter, val_t)
+        return conversions[key]
+
+
+def get_conversion(converter, val_t):
+    """Get the function and unit used to convert a ValueTuple.
+
+    Returns a tuple (function, unit) where function is the function that
+    converter would use to convert each element of val_t and unit is the unit
+    the converted ValueTuple would be in. Function is None if no conversion
+    is required. Follows the logic of weewx.units.Converter.convert() and
+    weewx.units.convert(), a KeyError is raised for an unknown unit or group.
+    """
+
+    if val_t[1] is None and val_t[2] is None:
+        return None, None
+    # determine which unit the group should be in, if the user has not
+    # specified anything then fall back to US units
+    target_unit = converter.group_unit_dict.get(val_t[2], weewx.units.USUnits[val_t[2]])
+    if val_t[1] == target_unit:
+        return None, target_unit
+    return weewx.units.conversionDict[val_t[1]][target_unit], target_unit
+
+
+def get_speed_bands(max_speed_range, speedfactor):
+    """Get the windrose speed band cutoff speeds and speed range text.
+
+    Returns a tuple of two tuples. The first contains the cutoff speed for
+    each of the seven speed bands, the second contains the speed range text
+    (eg '10-20') used in the legend for each speed band, the calm band (0)
+    has no speed range text. Both depend only on the maximum speed of the plot
+    range and the speed factors so results are cached keyed by
+    (max_speed_range, speedfactor).
+    """
+
+    key = (max_speed_range, tuple(speedfactor))
+    try:
+        return _speed_band_cache[key]
+    except KeyError:
+        pass
+    speed_list = (0,) + tuple([factor * max_speed_range for factor in speedfactor[1:]])
+    band_labels = ('',) + tuple([''.join([str(round_int(speed_list[i - 1], 0)),
+                                          "-", str(round_int(speed_list[i], 0))])
+                                 for i in range(1, 7)])
+    if len(_speed_band_cache) >= MEMO_CACHE_SIZE:
+        _speed_band_cache.clear()
+    _speed_band_cache[key] = (speed_list, band_labels)
+    return speed_list, band_labels
+
+
 def round_int(value, places):
     """Round value to 'places' but return as an integer if places=0."""
 
@@ -1273,8 +1670,24 @@ def get_ago(dt, d_years=0, d_months=0):
        If we try to return an invalid date due to differing month lengths
        (eg 30 Feb or 31 Sep) then just return the end of month (ie 28 Feb
        (if not a leap year else 29 Feb) or 30 Sep).
+
+       Results are cached as the same dates are used each report cycle.
     """
 
+    key = (dt, d_years, d_months)
+    try:
+        return _ago_cache[key]
+    except KeyError:
+        pass
+    if len(_ago_cache) >= MEMO_CACHE_SIZE:
+        _ago_cache.clear()
+    _ago_cache[key] = _result = _get_ago(dt, d_years, d_months)
+    return _result
+
+
+def _get_ago(dt, d_years, d_months):
+    """Uncached implementation of get_ago()."""
+
     # get year number, month number and day number applying offset as required
     _y, _m, _d = dt.year + d_years, dt.month + d_months, dt.day
     # calculate actual month number taking into account EOY rollover
@@ -1284,6 +1697,150 @@ def get_ago(dt, d_years=0, d_months=0):
     return date(_y + _a, _m + 1, _d if _d <= _eom else _eom)
 
 
+def get_utc_offset(ts):
+    """Get the local time UTC offset in minutes at a given timestamp.
+
+    Where available (Python 3) the offset is taken directly from the local
+    time struct. Otherwise the offset is calculated, as it only changes with
+    daylight saving calculated results are cached keyed by the local date and
+    daylight saving flag.
+    """
+
+    stop_struct = time.localtime(ts)
+    try:
+        return stop_struct.tm_gmtoff / 60
+    except AttributeError:
+        pass
+    key = (stop_struct.tm_year, stop_struct.tm_yday, stop_struct.tm_isdst)
+    try:
+        return _utc_offset_cache[key]
+    except KeyError:
+        pass
+    if len(_utc_offset_cache) >= MEMO_CACHE_SIZE:
+        _utc_offset_cache.clear()
+    utc_offset = (calendar.timegm(stop_struct) - calendar.timegm(time.gmtime(time.mktime(stop_struct)))) / 60
+    _utc_offset_cache[key] = utc_offset
+    return utc_offset
+
+
+def get_plot_start(stop_ts, days=0, years=0):
+    """Get the start timestamp of a plot ending at stop_ts.
+
+    The plot starts at midnight at the start of the day containing stop_ts
+    less 'days' days and 'years' years. The date arithmetic is done in local
+    time so the result is daylight saving safe. If going back 'years' years
+    lands on a non-existent date (ie 29 February) the previous day is used.
+    The same start is required by each template and SLE so results are
+    cached keyed by (stop_ts, days, years).
+    """
+
+    key = (stop_ts, days, years)
+    try:
+        return _plot_start_cache[key]
+    except KeyError:
+        pass
+    # first get the start of today
+    _ts = weeutil.weeutil.startOfDay(stop_ts)
+    # If we are only going back whole days and the UTC offset is the same at
+    # each end there was no daylight saving changeover so we can simply
+    # subtract the days.
+    _start_ts = _ts - days * 86400
+    if not years and get_utc_offset(_ts) == get_utc_offset(_start_ts):
+        _start_ts = float(_start_ts)
+    else:
+        # get the start of today as a datetime object so we can do some
+        # daylight saving safe date arithmetic
+        _ts_dt = datetime.datetime.fromtimestamp(_ts)
+        # go back the required number of years
+        if years:
+            try:
+                _ts_dt = _ts_dt.replace(year=_ts_dt.year - years)
+            except ValueError:
+                _ts_dt = _ts_dt.replace(year=_ts_dt.year - years, day=_ts_dt.day - 1)
+        # go back the required number of days
+        _start_dt = _ts_dt - datetime.timedelta(days=days)
+        # and convert back to a timestamp
+        _start_ts = time.mktime(_start_dt.timetuple())
+    if len(_plot_start_cache) >= MEMO_CACHE_SIZE:
+        _plot_start_cache.clear()
+    _plot_start_cache[key] = _start_ts
+    return _start_ts
+
+
+def get_period(stop_ts, days):
+    """Get the length in seconds of the 'days' local days ending at stop_ts.
+
+    Normally this is days * 86400 seconds but it will differ if there is a
+    daylight saving changeover in the period. If the UTC offset is the same at
+    each end of the period there was no changeover so the nominal length can
+    be used, otherwise do the date arithmetic in local time.
+    """
+
+    period = days * 86400.0
+    if get_utc_offset(stop_ts) == get_utc_offset(stop_ts - period):
+        return period
+    # first get our stop time as a dt object so we can do some dt maths
+    _stop_dt = datetime.datetime.fromtimestamp(stop_ts)
+    # then go back the required number of days to get our start
+    _start_dt = _stop_dt - datetime.timedelta(days=days)
+    return time.mktime(_stop_dt.timetuple()) - time.mktime(_start_dt.timetuple())
+
+
+def json_dumps(obj):
+    """Return a compact JSON formatted string representation of an object.
+
+    Uses orjson if it is installed otherwise falls back to the json module.
+    orjson returns bytes so decode to a string once here. Both produce JSON
+    without whitespace after separators, which for our large numeric arrays
+    considerably reduces the size of the generated output.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return _json_encoder.encode(obj)
+
+
+def json_zip_round(list_of_vectors, timestamp_vector, places, func=None):
+    """Create a JSON format vector of timestamp, data rows rounding values.
+
+    As json_zip_vectors() but each value is rounded to 'places' decimal places
+    as it is formatted, if 'func' is not None each non-None value is first
+    passed through func. Formatting each row directly avoids creating rounded
+    vectors and a list of tuples only for them to be walked again by the JSON
+    encoder. Timestamps must be integers. If a non-numeric value is
+    encountered fall back to round_vector() and json_zip_vectors().
+    """
+
+    value_fmt = '%%.%df' % places
+    row_fmt = ''.join(['[%d', (',' + value_fmt) * len(list_of_vectors), ']'])
+    try:
+        if len(list_of_vectors) == 1:
+            # a single data vector is by far the most common case so handle
+            # it without building row tuples
+            if func is None:
+                rows = [row_fmt % (ts, x) if x is not None else '[%d,null]' % ts
+                        for ts, x in zip(timestamp_vector, list_of_vectors[0])]
+            else:
+                rows = [row_fmt % (ts, func(x)) if x is not None else '[%d,null]' % ts
+                        for ts, x in zip(timestamp_vector, list_of_vectors[0])]
+        else:
+            _vectors = list_of_vectors
+            if func is not None:
+                _vectors = [[func(x) if x is not None else None for x in vector]
+                            for vector in list_of_vectors]
+            # rows without a None can be formatted in one operation, the
+            # occasional row with a None is formatted value by value
+            rows = [row_fmt % row if None not in row else
+                    '[%d,%s]' % (row[0],
+                                 ','.join([value_fmt % x if x is not None else 'null'
+                                           for x in row[1:]]))
+                    for row in zip(timestamp_vector, *_vectors)]
+    except TypeError:
+        return json_zip_vectors([round_vector(vector, places, func) for vector in list_of_vectors],
+                                timestamp_vector)
+    return ''.join(['[', ','.join(rows), ']'])
+
+
 def json_zip_vectors(list_of_vectors, timestamp_vector):
     """Create a JSON format vector of timestamp, data pairs.
 
@@ -1293,10 +1850,14 @@ def json_zip_vectors(list_of_vectors, timestamp_vector):
     """
 
     if len(list_of_vectors) > 0 and list_of_vectors[0] is not None:
+        # if we have no data points, as is the case for a sensor that is not
+        # present, there is nothing to zip or encode
+        if not list_of_vectors[0] or not timestamp_vector:
+            return '[]'
         # create a list of zipped timestamp, data pairs
         list_of_tuples = list(zip(timestamp_vector, *list_of_vectors))
         # return a JSON formatted string of the list of pairs
-        return json.dumps(list_of_tuples)
+        return json_dumps(list_of_tuples)
     else:
         # we have no data so return None
         return None
@@ -10,9 +10,11 @@ PARTICULAR PURPOSE.  See the GNU General Public License for more details.
 
                      Installer for Highcharts for WeeWX
 
- Version: 0.3.2                                         Date: 17 March 2021
+ Version: 0.3.3                                         Date: 15 October 2026
 
  Revision History
+    15 October 2026
+        - version number change only
     17 March 2021
         - version number change only
     16 October 2020
@@ -38,7 +40,7 @@ from distutils.version import StrictVersion
 from setup import ExtensionInstaller
 
 REQUIRED_VERSION = "3.4.0"
-HFW_VERSION = "0.3.2"
+HFW_VERSION = "0.3.3"
 
 def loader():
     return HfwInstaller()